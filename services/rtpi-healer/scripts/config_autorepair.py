@@ -15,6 +15,7 @@ import logging
 import shutil
 import subprocess
 from datetime import datetime
+from logging.handlers import TimedRotatingFileHandler
 from typing import Dict, List, Optional, Tuple, Any
 from pathlib import Path
 
@@ -617,7 +618,10 @@ if __name__ == "__main__":
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler('/var/log/rtpi-healer/config-autorepair.log'),
+            TimedRotatingFileHandler(
+                '/var/log/rtpi-healer/config-autorepair.log',
+                when='D', interval=1, backupCount=7, encoding='utf-8', utc=True
+            ),
             logging.StreamHandler()
         ]
     )
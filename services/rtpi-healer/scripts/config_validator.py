@@ -8,12 +8,17 @@ import os
 import sys
 import json
 import yaml
-import base64
+import binascii
+import functools
 import logging
 import re
 import subprocess
 import tempfile
+import threading
+from dataclasses import dataclass, field, replace
 from datetime import datetime
+from enum import IntEnum
+from logging.handlers import TimedRotatingFileHandler
 from typing import Dict, List, Optional, Tuple, Any
 from pathlib import Path
 
@@ -21,23 +26,77 @@ import psycopg2
 import redis
 import docker
 
+try:
+    import pybase64
+except ImportError:
+    import base64 as pybase64
+
 logger = logging.getLogger('rtpi-config-validator')
 
+# Compiled once at import; reused by every validator instance
+_BASE64_RE = re.compile(r'^[A-Za-z0-9+/]+={0,2}$')
+_ENCRYPTION_KEY_FIELDS = ('id', 'key', 'cipher', 'revoked')
+_SYSREPTOR_REQUIRED_VARS = (
+    'SECRET_KEY', 'DATABASE_HOST', 'DATABASE_NAME', 'DATABASE_USER',
+    'DATABASE_PASSWORD', 'REDIS_HOST', 'REDIS_PASSWORD'
+)
+
+class ValidationCategory(IntEnum):
+    """What a validation result is about, for filtering without parsing messages"""
+    GENERAL = 0
+    BASE64 = 1
+    ENCRYPTION_KEYS = 2
+
+@dataclass(slots=True)
 class ValidationResult:
     """Represents the result of a validation check"""
-    def __init__(self, passed: bool, message: str, severity: str = "error", auto_fixable: bool = False, fix_action: str = None):
-        self.passed = passed
-        self.message = message
-        self.severity = severity  # error, warning, info
-        self.auto_fixable = auto_fixable
-        self.fix_action = fix_action
-        self.timestamp = datetime.now()
+    passed: bool
+    message: str
+    severity: str = "error"  # error, warning, info
+    auto_fixable: bool = False
+    fix_action: Optional[str] = None
+    category: ValidationCategory = ValidationCategory.GENERAL
+    timestamp: datetime = field(default_factory=datetime.now)
+
+@functools.lru_cache(maxsize=4096)
+def _validate_base64_cached(value: str, min_bytes: int = 16) -> Tuple[bool, str]:
+    """Check a base64 value once; returns (passed, message without the field name)"""
+    try:
+        if not value:
+            return False, "is empty"
+        
+        # Reject obviously malformed input before decoding
+        if not _BASE64_RE.fullmatch(value):
+            return False, "has invalid base64 encoding: contains non-base64 characters"
+        
+        decoded_len = len(pybase64.b64decode(value, validate=True))
+        
+        # Check if decoded length is reasonable for encryption keys (typically 32+ bytes)
+        if decoded_len < min_bytes:
+            return False, f"base64 decodes to only {decoded_len} bytes (expected {min_bytes}+)"
+        
+        return True, f"has valid base64 encoding ({decoded_len} bytes)"
+        
+    except (binascii.Error, ValueError) as e:
+        return False, f"has invalid base64 encoding: {str(e)}"
 
 class ConfigurationValidator:
     """Main configuration validation engine"""
     
+    # Files and directories read by run_comprehensive_validation
+    WATCHED_PATHS = (
+        '/opt/rtpi-pen/configs/rtpi-sysreptor/app.env',
+        '/opt/kasm/1.15.0/conf',
+        '/opt/kasm/1.15.0/log',
+        '/opt/kasm/1.15.0/tmp',
+        '/opt/empire/data/empire.db'
+    )
+    
     def __init__(self):
         self.validation_results = []
+        self._env_cache = {}  # path -> ((mtime_ns, size), parsed env vars)
+        self._validation_cache = {}  # path -> ((mtime_ns, size), file-derived validation results)
+        self._cache_lock = threading.Lock()
         self.docker_client = docker.from_env()
         self.config_templates = {
             'sysreptor': '/opt/rtpi-pen/configs/rtpi-sysreptor/sysreptor/deploy/app.env.example',
@@ -57,36 +116,28 @@ class ConfigurationValidator:
     
     def validate_base64_encoding(self, value: str, field_name: str) -> ValidationResult:
         """Validate base64 encoding of a value"""
+        return self._base64_result(value, field_name)
+    
+    def validate_base64_batch(self, items: List[Tuple[str, str]]) -> List[ValidationResult]:
+        """Validate many (value, field_name) pairs; each distinct value is decoded once"""
+        return [self._base64_result(value, field_name) for value, field_name in items]
+    
+    def _base64_result(self, value: str, field_name: str) -> ValidationResult:
+        """Wrap the memoized base64 check in a ValidationResult for field_name"""
         try:
-            if not value:
-                return ValidationResult(
-                    False, 
-                    f"{field_name} is empty",
-                    auto_fixable=True,
-                    fix_action="generate_base64_key"
-                )
-            
-            # Try to decode base64
-            decoded = base64.b64decode(value, validate=True)
-            
-            # Check if decoded length is reasonable for encryption keys (typically 32+ bytes)
-            if len(decoded) < 16:
-                return ValidationResult(
-                    False,
-                    f"{field_name} base64 decodes to only {len(decoded)} bytes (expected 16+)",
-                    auto_fixable=True,
-                    fix_action="generate_base64_key"
-                )
-            
-            return ValidationResult(True, f"{field_name} has valid base64 encoding ({len(decoded)} bytes)")
-            
-        except Exception as e:
-            return ValidationResult(
-                False,
-                f"{field_name} has invalid base64 encoding: {str(e)}",
-                auto_fixable=True,
-                fix_action="generate_base64_key"
-            )
+            passed, detail = _validate_base64_cached(value)
+        except TypeError as e:  # unhashable, e.g. a non-string JSON value
+            passed, detail = False, f"has invalid base64 encoding: {str(e)}"
+        
+        if passed:
+            return ValidationResult(True, f"{field_name} {detail}", category=ValidationCategory.BASE64)
+        return ValidationResult(
+            False,
+            f"{field_name} {detail}",
+            auto_fixable=True,
+            fix_action="generate_base64_key",
+            category=ValidationCategory.BASE64
+        )
     
     def validate_json_structure(self, json_str: str, field_name: str, required_keys: List[str] = None) -> ValidationResult:
         """Validate JSON structure and required keys"""
@@ -113,30 +164,50 @@ class ConfigurationValidator:
                 fix_action="fix_json_structure"
             )
     
+    def parse_encryption_keys(self, encryption_keys_str: str) -> Any:
+        """Parse the ENCRYPTION_KEYS JSON; raises ValueError or TypeError if it is not valid JSON"""
+        return json.loads(encryption_keys_str)
+    
+    def _encryption_keys_parse_error(self, error: Exception) -> ValidationResult:
+        """Result for an ENCRYPTION_KEYS value that parse_encryption_keys rejected"""
+        return ValidationResult(
+            False,
+            f"Failed to validate encryption keys: {str(error)}",
+            auto_fixable=True,
+            fix_action="generate_encryption_keys",
+            category=ValidationCategory.ENCRYPTION_KEYS
+        )
+    
     def validate_encryption_keys(self, encryption_keys_str: str) -> ValidationResult:
         """Validate SysReptor encryption keys format and content"""
         try:
-            # Parse the encryption keys JSON
-            encryption_keys = json.loads(encryption_keys_str)
-            
+            encryption_keys = self.parse_encryption_keys(encryption_keys_str)
+        except (TypeError, ValueError) as e:
+            return self._encryption_keys_parse_error(e)
+        return self.validate_encryption_keys_parsed(encryption_keys)
+    
+    def validate_encryption_keys_parsed(self, encryption_keys: Any) -> ValidationResult:
+        """Validate SysReptor encryption keys already parsed by parse_encryption_keys"""
+        try:
             if not isinstance(encryption_keys, list) or len(encryption_keys) == 0:
                 return ValidationResult(
                     False,
                     "ENCRYPTION_KEYS must be a non-empty list",
                     auto_fixable=True,
-                    fix_action="generate_encryption_keys"
+                    fix_action="generate_encryption_keys",
+                    category=ValidationCategory.ENCRYPTION_KEYS
                 )
             
             for i, key_obj in enumerate(encryption_keys):
                 # Check required fields
-                required_fields = ['id', 'key', 'cipher', 'revoked']
-                missing_fields = [field for field in required_fields if field not in key_obj]
+                missing_fields = [field for field in _ENCRYPTION_KEY_FIELDS if field not in key_obj]
                 if missing_fields:
                     return ValidationResult(
                         False,
                         f"Encryption key {i} missing fields: {missing_fields}",
                         auto_fixable=True,
-                        fix_action="fix_encryption_key_structure"
+                        fix_action="fix_encryption_key_structure",
+                        category=ValidationCategory.ENCRYPTION_KEYS
                     )
                 
                 # Validate key base64 encoding
@@ -146,7 +217,8 @@ class ConfigurationValidator:
                         False,
                         f"Encryption key {i} has invalid base64: {key_validation.message}",
                         auto_fixable=True,
-                        fix_action="regenerate_encryption_key"
+                        fix_action="regenerate_encryption_key",
+                        category=ValidationCategory.ENCRYPTION_KEYS
                     )
                 
                 # Check cipher type
@@ -154,17 +226,23 @@ class ConfigurationValidator:
                     return ValidationResult(
                         False,
                         f"Encryption key {i} has unsupported cipher: {key_obj['cipher']}",
-                        severity="warning"
+                        severity="warning",
+                        category=ValidationCategory.ENCRYPTION_KEYS
                     )
             
-            return ValidationResult(True, f"All {len(encryption_keys)} encryption keys are valid")
+            return ValidationResult(
+                True,
+                f"All {len(encryption_keys)} encryption keys are valid",
+                category=ValidationCategory.ENCRYPTION_KEYS
+            )
             
         except Exception as e:
             return ValidationResult(
                 False,
                 f"Failed to validate encryption keys: {str(e)}",
                 auto_fixable=True,
-                fix_action="generate_encryption_keys"
+                fix_action="generate_encryption_keys",
+                category=ValidationCategory.ENCRYPTION_KEYS
             )
     
     def validate_database_connection(self, host: str, database: str, user: str, password: str, port: int = 5432) -> ValidationResult:
@@ -289,6 +367,32 @@ class ConfigurationValidator:
         
         return ValidationResult(True, f"All {len(required_vars)} required environment variables are present")
     
+    def _load_env_file(self, config_file: str) -> Dict[str, str]:
+        """Parse an env file, reusing the previous parse while its mtime is unchanged"""
+        st = os.stat(config_file)
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._cache_lock:
+            cached = self._env_cache.get(config_file)
+        if cached and cached[0] == signature:
+            return cached[1]
+        
+        env_vars = self._parse_env_file(config_file)
+        with self._cache_lock:
+            self._env_cache[config_file] = (signature, env_vars)
+        return env_vars
+    
+    def _parse_env_file(self, config_file: str) -> Dict[str, str]:
+        """Parse KEY=VALUE lines one at a time without loading the whole file"""
+        env_vars = {}
+        with open(config_file, 'r', buffering=1 << 16) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    key, sep, value = line.partition('=')
+                    if sep:
+                        env_vars[key] = value
+        return env_vars
+    
     def validate_sysreptor_configuration(self, config_file: str) -> List[ValidationResult]:
         """Comprehensive SysReptor configuration validation"""
         results = []
@@ -302,42 +406,29 @@ class ConfigurationValidator:
             ))
             return results
         
+        # Checks that depend only on the file are reused while it is unchanged;
+        # database and Redis reachability is probed on every call
+        st = os.stat(config_file)
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._cache_lock:
+            cached = self._validation_cache.get(config_file)
+        if cached and cached[0] == signature:
+            file_results = cached[1]
+        else:
+            file_results = tuple(self._validate_sysreptor_file(config_file))
+            with self._cache_lock:
+                self._validation_cache[config_file] = (signature, file_results)
+        
+        # Hand out copies stamped with this run's time; the cached results stay untouched
+        now = datetime.now()
+        results.extend(replace(result, timestamp=now) for result in file_results)
+        
+        try:
+            env_vars = self._load_env_file(config_file)
+        except Exception:
+            return results  # already reported by the file checks
+        
         try:
-            # Load configuration
-            env_vars = {}
-            with open(config_file, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        env_vars[key] = value
-            
-            # Required variables
-            required_vars = [
-                'SECRET_KEY', 'DATABASE_HOST', 'DATABASE_NAME', 'DATABASE_USER',
-                'DATABASE_PASSWORD', 'REDIS_HOST', 'REDIS_PASSWORD'
-            ]
-            
-            results.append(self.validate_environment_variables(env_vars, required_vars))
-            
-            # Validate SECRET_KEY
-            if 'SECRET_KEY' in env_vars:
-                secret_key = env_vars['SECRET_KEY']
-                if len(secret_key) < 50:
-                    results.append(ValidationResult(
-                        False,
-                        f"SECRET_KEY is too short ({len(secret_key)} chars, recommended 50+)",
-                        severity="warning",
-                        auto_fixable=True,
-                        fix_action="generate_secret_key"
-                    ))
-                else:
-                    results.append(ValidationResult(True, "SECRET_KEY has adequate length"))
-            
-            # Validate encryption keys if present
-            if 'ENCRYPTION_KEYS' in env_vars:
-                results.append(self.validate_encryption_keys(env_vars['ENCRYPTION_KEYS']))
-            
             # Validate database connection
             if all(var in env_vars for var in ['DATABASE_HOST', 'DATABASE_NAME', 'DATABASE_USER', 'DATABASE_PASSWORD']):
                 port = int(env_vars.get('DATABASE_PORT', 5432))
@@ -370,6 +461,49 @@ class ConfigurationValidator:
         
         return results
     
+    def _validate_sysreptor_file(self, config_file: str) -> List[ValidationResult]:
+        """Run the SysReptor checks that depend only on the config file contents"""
+        results = []
+        
+        try:
+            # Load configuration
+            env_vars = self._load_env_file(config_file)
+            
+            results.append(self.validate_environment_variables(env_vars, _SYSREPTOR_REQUIRED_VARS))
+            
+            # Validate SECRET_KEY
+            if 'SECRET_KEY' in env_vars:
+                secret_key = env_vars['SECRET_KEY']
+                if len(secret_key) < 50:
+                    results.append(ValidationResult(
+                        False,
+                        f"SECRET_KEY is too short ({len(secret_key)} chars, recommended 50+)",
+                        severity="warning",
+                        auto_fixable=True,
+                        fix_action="generate_secret_key"
+                    ))
+                else:
+                    results.append(ValidationResult(True, "SECRET_KEY has adequate length"))
+            
+            # Validate encryption keys if present
+            if 'ENCRYPTION_KEYS' in env_vars:
+                try:
+                    encryption_keys = self.parse_encryption_keys(env_vars['ENCRYPTION_KEYS'])
+                except (TypeError, ValueError) as e:
+                    results.append(self._encryption_keys_parse_error(e))
+                else:
+                    results.append(self.validate_encryption_keys_parsed(encryption_keys))
+            
+        except Exception as e:
+            results.append(ValidationResult(
+                False,
+                f"Error parsing SysReptor configuration: {str(e)}",
+                auto_fixable=True,
+                fix_action="repair_config_syntax"
+            ))
+        
+        return results
+    
     def validate_kasm_configuration(self) -> List[ValidationResult]:
         """Validate Kasm Workspaces configuration"""
         results = []
@@ -493,7 +627,10 @@ if __name__ == "__main__":
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.FileHandler('/var/log/rtpi-healer/config-validator.log'),
+            TimedRotatingFileHandler(
+                '/var/log/rtpi-healer/config-validator.log',
+                when='D', interval=1, backupCount=7, encoding='utf-8', utc=True
+            ),
             logging.StreamHandler()
         ]
     )
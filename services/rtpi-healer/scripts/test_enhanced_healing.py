@@ -8,12 +8,23 @@ import os
 import sys
 import json
 import logging
+import tempfile
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from functools import partial
 from datetime import datetime
 from typing import Dict, Any
 
-from config_validator import ConfigurationValidator
+from config_validator import ConfigurationValidator, ValidationCategory
 from config_autorepair import ConfigurationAutoRepair
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,6 +35,53 @@ logging.basicConfig(
 )
 logger = logging.getLogger('enhanced-healing-test')
 
+# Keep scratch configs on tmpfs when it is available
+TEMP_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+_BANNER = """
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                    RTPI-PEN Enhanced Self-Healing System                    ║
+║                         Configuration Test & Demo                           ║
+║                                                                              ║
+║  🔍 Validates configurations proactively                                    ║
+║  🔧 Automatically repairs detected issues                                   ║
+║  🛡️ Prevents startup failures like the recent SysReptor base64 issue       ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+"""
+
+_SEP = "=" * 80
+_SUMMARY_HEADER = (
+    "\n" + _SEP + "\n"
+    "🎯 ENHANCED SELF-HEALING SYSTEM TEST SUMMARY\n"
+    + _SEP + "\n"
+    "📊 Test Suites: {overall_success_rate} successful\n"
+)
+_SUMMARY_CASES = "📋 Test Cases: {test_case_success_rate} passed\n"
+_SUMMARY_FOOTER = (
+    "\n✨ ENHANCED CAPABILITIES DEMONSTRATED:\n"
+    "  🔍 Proactive configuration validation\n"
+    "  🔧 Automatic configuration repair\n"
+    "  🛡️ Prevention of startup failures\n"
+    "  📊 Comprehensive issue detection\n"
+    "  🔄 Self-healing workflow integration\n"
+    "\n💡 BENEFITS:\n"
+    "  ✅ Prevents issues like the recent SysReptor base64 encryption key problem\n"
+    "  ✅ Reduces manual intervention and downtime\n"
+    "  ✅ Maintains service availability through intelligent recovery\n"
+    "  ✅ Provides comprehensive visibility into system health\n"
+    "\n🔮 NEXT STEPS:\n"
+    "  • The enhanced healer will run proactive validation every 30 minutes\n"
+    "  • Pre-startup validation prevents problematic container restarts\n"
+    "  • Configuration auto-repair handles common issues automatically\n"
+    "  • System continues to monitor and heal container issues\n"
+    + _SEP + "\n"
+)
+
+def _truncate(value: str, limit: int = 20) -> str:
+    """Shorten long values for the report, leaving short ones uncopied"""
+    return value if len(value) <= limit else f"{value[:limit]}..."
+
 class EnhancedHealingTest:
     """Test suite for enhanced self-healing capabilities"""
     
@@ -31,22 +89,24 @@ class EnhancedHealingTest:
         self.validator = ConfigurationValidator()
         self.autorepair = ConfigurationAutoRepair()
         self.test_results = {}
+        # Repairs write the live SysReptor config, so suites take turns
+        self._repair_lock = threading.Lock()
     
     def print_banner(self):
         """Print test banner"""
-        banner = """
-╔══════════════════════════════════════════════════════════════════════════════╗
-║                    RTPI-PEN Enhanced Self-Healing System                    ║
-║                         Configuration Test & Demo                           ║
-║                                                                              ║
-║  🔍 Validates configurations proactively                                    ║
-║  🔧 Automatically repairs detected issues                                   ║
-║  🛡️ Prevents startup failures like the recent SysReptor base64 issue       ║
-╚══════════════════════════════════════════════════════════════════════════════╝
-        """
-        print(banner)
+        sys.stdout.write(_BANNER)
+    
+    def _run_cases(self, test_cases: list, check, fail_fast: bool) -> list:
+        """Run (description, value, should_pass) cases, optionally stopping at the first mismatch"""
+        results = []
+        for description, test_value, should_pass in test_cases:
+            result = check(test_value, description)
+            results.append(result)
+            if fail_fast and result.passed != should_pass:
+                break
+        return results
     
-    def test_base64_validation(self) -> Dict[str, Any]:
+    def test_base64_validation(self, fail_fast: bool = False) -> Dict[str, Any]:
         """Test base64 validation capabilities"""
         logger.info("🧪 Testing Base64 Validation...")
         
@@ -58,31 +118,51 @@ class EnhancedHealingTest:
             ("Proper key length", "VGhpcyBpcyBhIDMyLWJ5dGUga2V5IGZvciBBRVMtMjU2IGVuY3J5cHRpb24h", True)  # 32-byte key
         ]
         
-        results = []
-        for description, test_value, should_pass in test_cases:
-            result = self.validator.validate_base64_encoding(test_value, f"Test: {description}")
-            passed = result.passed == should_pass
-            
-            results.append({
-                'description': description,
-                'test_value': test_value[:20] + "..." if len(test_value) > 20 else test_value,
-                'expected': 'PASS' if should_pass else 'FAIL',
-                'actual': 'PASS' if result.passed else 'FAIL',
-                'test_passed': passed,
-                'message': result.message
-            })
-            
-            status = "✅" if passed else "❌"
-            logger.info(f"  {status} {description}: Expected {should_pass}, Got {result.passed}")
+        if fail_fast:
+            # Same batch validator, fed one case at a time so it can stop at the first mismatch
+            batch_results = self._run_cases(
+                test_cases,
+                lambda value, description: self.validator.validate_base64_batch([(value, f"Test: {description}")])[0],
+                fail_fast
+            )
+            test_cases = test_cases[:len(batch_results)]
+        else:
+            batch_results = self.validator.validate_base64_batch(
+                [(test_value, f"Test: {description}") for description, test_value, _ in test_cases]
+            )
+        
+        # Column-oriented results; rows are only assembled for the report
+        descriptions = [description for description, _, _ in test_cases]
+        expected = [should_pass for _, _, should_pass in test_cases]
+        actual = [result.passed for result in batch_results]
+        test_passed = [a == e for a, e in zip(actual, expected)]
+        messages = [result.message for result in batch_results]
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n".join(
+                f"  {'✅' if ok else '❌'} {description}: Expected {should_pass}, Got {got}"
+                for description, should_pass, got, ok in zip(descriptions, expected, actual, test_passed)
+            ))
         
         return {
             'test_name': 'Base64 Validation',
             'total_cases': len(test_cases),
-            'passed_cases': sum(1 for r in results if r['test_passed']),
-            'results': results
+            'passed_cases': sum(test_passed),
+            'results': [
+                {
+                    'description': description,
+                    'test_value': _truncate(test_value),
+                    'expected': 'PASS' if should_pass else 'FAIL',
+                    'actual': 'PASS' if got else 'FAIL',
+                    'test_passed': ok,
+                    'message': message
+                }
+                for (description, test_value, should_pass), got, ok, message
+                in zip(test_cases, actual, test_passed, messages)
+            ]
         }
     
-    def test_encryption_keys_validation(self) -> Dict[str, Any]:
+    def test_encryption_keys_validation(self, fail_fast: bool = False) -> Dict[str, Any]:
         """Test encryption keys validation"""
         logger.info("🔐 Testing Encryption Keys Validation...")
         
@@ -98,29 +178,43 @@ class EnhancedHealingTest:
             ("Empty array", '[]', False)
         ]
         
-        results = []
-        for description, test_value, should_pass in test_cases:
-            result = self.validator.validate_encryption_keys(test_value)
-            passed = result.passed == should_pass
-            
-            results.append({
-                'description': description,
-                'expected': 'PASS' if should_pass else 'FAIL',
-                'actual': 'PASS' if result.passed else 'FAIL',
-                'test_passed': passed,
-                'message': result.message,
-                'auto_fixable': result.auto_fixable
-            })
-            
-            status = "✅" if passed else "❌"
-            auto_fix = "🔧" if result.auto_fixable else ""
-            logger.info(f"  {status} {auto_fix} {description}: {result.message}")
+        key_results = self._run_cases(
+            test_cases,
+            lambda value, _: self.validator.validate_encryption_keys(value),
+            fail_fast
+        )
+        test_cases = test_cases[:len(key_results)]
+        
+        # Column-oriented results; rows are only assembled for the report
+        descriptions = [description for description, _, _ in test_cases]
+        expected = [should_pass for _, _, should_pass in test_cases]
+        actual = [result.passed for result in key_results]
+        test_passed = [a == e for a, e in zip(actual, expected)]
+        messages = [result.message for result in key_results]
+        auto_fixable = [result.auto_fixable for result in key_results]
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n".join(
+                f"  {'✅' if ok else '❌'} {'🔧' if fixable else ''} {description}: {message}"
+                for description, ok, fixable, message in zip(descriptions, test_passed, auto_fixable, messages)
+            ))
         
         return {
             'test_name': 'Encryption Keys Validation',
             'total_cases': len(test_cases),
-            'passed_cases': sum(1 for r in results if r['test_passed']),
-            'results': results
+            'passed_cases': sum(test_passed),
+            'results': [
+                {
+                    'description': description,
+                    'expected': 'PASS' if should_pass else 'FAIL',
+                    'actual': 'PASS' if got else 'FAIL',
+                    'test_passed': ok,
+                    'message': message,
+                    'auto_fixable': fixable
+                }
+                for description, should_pass, got, ok, message, fixable
+                in zip(descriptions, expected, actual, test_passed, messages, auto_fixable)
+            ]
         }
     
     def test_current_sysreptor_config(self) -> Dict[str, Any]:
@@ -144,11 +238,15 @@ class EnhancedHealingTest:
         auto_fixable = sum(1 for r in validation_results if not r.passed and r.auto_fixable)
         
         # Show validation details
-        for result in validation_results:
-            status = "✅" if result.passed else "❌"
-            auto_fix = "🔧" if result.auto_fixable else ""
-            severity = f"[{result.severity.upper()}]" if hasattr(result, 'severity') and result.severity != 'error' else ""
-            logger.info(f"  {status} {auto_fix} {severity} {result.message}")
+        if logger.isEnabledFor(logging.INFO):
+            lines = []
+            for result in validation_results:
+                status = "✅" if result.passed else "❌"
+                auto_fix = "🔧" if result.auto_fixable else ""
+                severity = f"[{result.severity.upper()}]" if result.severity != 'error' else ""
+                lines.append(f"  {status} {auto_fix} {severity} {result.message}")
+            if lines:
+                logger.info("\n".join(lines))
         
         return {
             'test_name': 'Current SysReptor Configuration',
@@ -159,23 +257,13 @@ class EnhancedHealingTest:
             'failed_checks': failed_checks,
             'auto_fixable_failures': auto_fixable,
             'overall_status': 'HEALTHY' if failed_checks == 0 else 'ISSUES_DETECTED',
-            'validation_results': [
-                {
-                    'message': r.message,
-                    'passed': r.passed,
-                    'auto_fixable': r.auto_fixable,
-                    'severity': getattr(r, 'severity', 'error')
-                } for r in validation_results
-            ]
+            'validation_results': [asdict(r) for r in validation_results]
         }
     
     def test_auto_repair_capabilities(self) -> Dict[str, Any]:
         """Test auto-repair capabilities"""
         logger.info("🔧 Testing Auto-Repair Capabilities...")
         
-        # Create a temporary invalid config to test repair
-        temp_config = "/tmp/test_sysreptor_config.env"
-        
         # Create a config with intentional issues
         invalid_config_content = """# Test configuration with issues
 SECRET_KEY=too_short
@@ -188,8 +276,12 @@ DATABASE_PASSWORD=sysreptorpassword
 # Missing REDIS_PASSWORD
 """
         
+        # Create a temporary invalid config to test repair
+        temp_config = None
+        
         try:
-            with open(temp_config, 'w') as f:
+            with tempfile.NamedTemporaryFile('w', dir=TEMP_DIR, prefix='test_sysreptor_config_', suffix='.env', delete=False) as f:
+                temp_config = f.name
                 f.write(invalid_config_content)
             
             # Validate the broken config
@@ -204,10 +296,14 @@ DATABASE_PASSWORD=sysreptorpassword
             # Attempt repairs
             if failed_validations:
                 logger.info("  🔨 Attempting automatic repairs...")
-                repair_summary = self.autorepair.repair_validation_failures(failed_validations)
+                with self._repair_lock:
+                    repair_summary = self.autorepair.repair_validation_failures(failed_validations)
                 
-                # Re-validate after repair
-                post_repair_results = self.validator.validate_sysreptor_configuration(temp_config)
+                # Re-validate after repair; nothing changed if every repair failed
+                if repair_summary.get('successful_repairs', 0) > 0:
+                    post_repair_results = self.validator.validate_sysreptor_configuration(temp_config)
+                else:
+                    post_repair_results = validation_results
                 post_repair_failures = sum(1 for r in post_repair_results if not r.passed)
                 
                 return {
@@ -235,8 +331,8 @@ DATABASE_PASSWORD=sysreptorpassword
             }
         finally:
             # Clean up temp file
-            if os.path.exists(temp_config):
-                os.remove(temp_config)
+            if temp_config:
+                os.unlink(temp_config)
     
     def demonstrate_issue_prevention(self) -> Dict[str, Any]:
         """Demonstrate how the system would have prevented the recent SysReptor issue"""
@@ -256,10 +352,11 @@ ENCRYPTION_KEYS=[{"id":"a704e0bc-a687-452b-aa59-bd23a3bff113","key":"olK4x8gl9pY
 DEFAULT_ENCRYPTION_KEY_ID=a704e0bc-a687-452b-aa59-bd23a3bff113
 """
         
-        temp_problematic_config = "/tmp/problematic_sysreptor.env"
+        temp_problematic_config = None
         
         try:
-            with open(temp_problematic_config, 'w') as f:
+            with tempfile.NamedTemporaryFile('w', dir=TEMP_DIR, prefix='problematic_sysreptor_', suffix='.env', delete=False) as f:
+                temp_problematic_config = f.name
                 f.write(problematic_config)
             
             logger.info("  📝 Created configuration with the problematic base64 encryption key...")
@@ -268,19 +365,23 @@ DEFAULT_ENCRYPTION_KEY_ID=a704e0bc-a687-452b-aa59-bd23a3bff113
             logger.info("  🔍 Step 1: Detecting the issue...")
             validation_results = self.validator.validate_sysreptor_configuration(temp_problematic_config)
             
-            encryption_key_issues = [r for r in validation_results if not r.passed and 'encryption' in r.message.lower()]
+            encryption_key_issues = [r for r in validation_results if not r.passed and r.category is ValidationCategory.ENCRYPTION_KEYS]
             
             if encryption_key_issues:
                 logger.info(f"  ❌ Issue detected: {encryption_key_issues[0].message}")
                 
                 # Step 2: Auto-repair
                 logger.info("  🔧 Step 2: Automatic repair...")
-                repair_summary = self.autorepair.repair_validation_failures(encryption_key_issues)
+                with self._repair_lock:
+                    repair_summary = self.autorepair.repair_validation_failures(encryption_key_issues)
                 
                 # Step 3: Re-validation
                 logger.info("  ✅ Step 3: Re-validation after repair...")
-                post_repair_results = self.validator.validate_sysreptor_configuration(temp_problematic_config)
-                post_repair_encryption_issues = [r for r in post_repair_results if not r.passed and 'encryption' in r.message.lower()]
+                if repair_summary.get('successful_repairs', 0) > 0:
+                    post_repair_results = self.validator.validate_sysreptor_configuration(temp_problematic_config)
+                else:
+                    post_repair_results = validation_results
+                post_repair_encryption_issues = [r for r in post_repair_results if not r.passed and r.category is ValidationCategory.ENCRYPTION_KEYS]
                 
                 prevention_successful = len(post_repair_encryption_issues) == 0
                 
@@ -313,23 +414,29 @@ DEFAULT_ENCRYPTION_KEY_ID=a704e0bc-a687-452b-aa59-bd23a3bff113
                 'success': False
             }
         finally:
-            if os.path.exists(temp_problematic_config):
-                os.remove(temp_problematic_config)
+            if temp_problematic_config:
+                os.unlink(temp_problematic_config)
     
-    def run_comprehensive_test(self) -> Dict[str, Any]:
+    def run_comprehensive_test(self, fail_fast: bool = False) -> Dict[str, Any]:
         """Run all tests and generate comprehensive report"""
         logger.info("🚀 Starting comprehensive enhanced self-healing test suite...")
         
         self.print_banner()
         
-        # Run all test suites
-        test_suites = [
-            self.test_base64_validation(),
-            self.test_encryption_keys_validation(),
-            self.test_current_sysreptor_config(),
-            self.test_auto_repair_capabilities(),
-            self.demonstrate_issue_prevention()
-        ]
+        # Read the live SysReptor config before any repair suite can rewrite it
+        current_config = self.test_current_sysreptor_config()
+        
+        # Run the remaining suites concurrently; results keep the submission order
+        suites = (
+            partial(self.test_base64_validation, fail_fast=fail_fast),
+            partial(self.test_encryption_keys_validation, fail_fast=fail_fast),
+            self.test_auto_repair_capabilities,
+            self.demonstrate_issue_prevention
+        )
+        with ThreadPoolExecutor(max_workers=len(suites)) as executor:
+            futures = [executor.submit(suite) for suite in suites]
+            test_suites = [future.result() for future in futures]
+        test_suites.insert(2, current_config)
         
         # Compile results
         overall_results = {
@@ -369,45 +476,34 @@ DEFAULT_ENCRYPTION_KEY_ID=a704e0bc-a687-452b-aa59-bd23a3bff113
     
     def _print_summary(self, summary: Dict[str, Any]):
         """Print test summary"""
-        print("\n" + "="*80)
-        print("🎯 ENHANCED SELF-HEALING SYSTEM TEST SUMMARY")
-        print("="*80)
-        print(f"📊 Test Suites: {summary['overall_success_rate']} successful")
+        out = _SUMMARY_HEADER.format(**summary)
         if summary.get('total_test_cases', 0) > 0:
-            print(f"📋 Test Cases: {summary['test_case_success_rate']} passed")
-        
-        print("\n✨ ENHANCED CAPABILITIES DEMONSTRATED:")
-        print("  🔍 Proactive configuration validation")
-        print("  🔧 Automatic configuration repair")
-        print("  🛡️ Prevention of startup failures")
-        print("  📊 Comprehensive issue detection")
-        print("  🔄 Self-healing workflow integration")
-        
-        print("\n💡 BENEFITS:")
-        print("  ✅ Prevents issues like the recent SysReptor base64 encryption key problem")
-        print("  ✅ Reduces manual intervention and downtime")
-        print("  ✅ Maintains service availability through intelligent recovery")
-        print("  ✅ Provides comprehensive visibility into system health")
-        
-        print("\n🔮 NEXT STEPS:")
-        print("  • The enhanced healer will run proactive validation every 30 minutes")
-        print("  • Pre-startup validation prevents problematic container restarts")
-        print("  • Configuration auto-repair handles common issues automatically")
-        print("  • System continues to monitor and heal container issues")
-        
-        print("="*80)
+            out += _SUMMARY_CASES.format(**summary)
+        sys.stdout.write(out + _SUMMARY_FOOTER)
+        sys.stdout.flush()
+
 
 def main():
     """Main test execution"""
     test_suite = EnhancedHealingTest()
     
     try:
-        results = test_suite.run_comprehensive_test()
+        # CI gates only need the exit code, so stop case loops at the first mismatch
+        fail_fast = os.environ.get('HEALING_TEST_FAIL_FAST') == '1'
+        results = test_suite.run_comprehensive_test(fail_fast=fail_fast)
         
         # Save detailed results
-        report_file = f"/tmp/enhanced-healing-test-{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(report_file, 'w') as f:
-            json.dump(results, f, indent=2, default=str)
+        report_file = f"/tmp/enhanced-healing-test-{time.time_ns()}.json"
+        if orjson:
+            with open(report_file, 'wb') as f:
+                f.write(orjson.dumps(
+                    results,
+                    default=str,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_DATACLASS
+                ))
+        else:
+            with open(report_file, 'w') as f:
+                json.dump(results, f, indent=2, default=str)
         
         print(f"\n📄 Detailed test report saved to: {report_file}")
         
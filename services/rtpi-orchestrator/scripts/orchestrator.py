@@ -8,14 +8,19 @@ import os
 import sys
 import time
 import json
+import gzip
+import base64
+import heapq
 import logging
+import shutil
+import signal
 import requests
 import threading
-import subprocess
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from flask import Flask, jsonify, request
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from flask import Flask, Response, request
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 
 import docker
 import schedule
@@ -23,6 +28,16 @@ import yaml
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+try:
+    from waitress import serve
+except ImportError:  # Fall back to Flask's threaded server
+    serve = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -34,11 +49,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger('rtpi-orchestrator')
 
+class OperationInProgress(RuntimeError):
+    """Raised when a single-flight operation is already running"""
+
+def _dumps(payload) -> bytes:
+    """Serialize an API payload compactly, with orjson when it is installed"""
+    if orjson:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False, default=str).encode()
+
+def _json_response(payload, status: int = 200) -> Response:
+    """Build a JSON response without going through jsonify"""
+    return Response(_dumps(payload), status=status, mimetype='application/json')
+
 class ServiceDependencyManager:
     """Manages service dependencies and startup order"""
     
     def __init__(self):
-        self.dependencies = {
+        dependencies = {
             'rtpi-database': [],
             'rtpi-cache': [],
             'rtpi-healer': ['rtpi-database', 'rtpi-cache'],
@@ -47,43 +75,105 @@ class ServiceDependencyManager:
             'sysreptor-db': [],
             'sysreptor-app': ['sysreptor-db'],
         }
+        self.dependencies = {svc: frozenset(deps) for svc, deps in dependencies.items()}
+        
+        # Reverse index: which services wait on each service
+        dependents = {svc: set() for svc in self.dependencies}
+        for svc, deps in self.dependencies.items():
+            for dep in deps:
+                dependents.setdefault(dep, set()).add(svc)
+        self.dependents = {svc: frozenset(users) for svc, users in dependents.items()}
+        
+        # Derived views, computed once
+        self.startup_order = self._topological_order()
+        self.startup_levels = self._startup_levels()
+    
+    def _topological_order(self) -> List[str]:
+        """Order services so each starts after its dependencies (Kahn's algorithm)"""
+        in_degree = {svc: len(self.dependencies.get(svc, ())) for svc in self.dependents}
+        
+        # Alphabetical frontier keeps the order deterministic
+        ready = [svc for svc, degree in in_degree.items() if degree == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            svc = heapq.heappop(ready)
+            order.append(svc)
+            for dependent in self.dependents[svc]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+        
+        if len(order) != len(in_degree):
+            cyclic = sorted(svc for svc, degree in in_degree.items() if degree > 0)
+            raise ValueError(f"Circular service dependencies: {cyclic}")
+        
+        return order
+    
+    def _startup_levels(self) -> List[List[str]]:
+        """Group services by dependency depth; services in one level can start together"""
+        depth = {}
+        for svc in self.startup_order:
+            depth[svc] = 1 + max((depth[dep] for dep in self.dependencies.get(svc, ())), default=-1)
         
-        self.startup_order = [
-            'rtpi-database',
-            'rtpi-cache',
-            'sysreptor-db',
-            'rtpi-healer',
-            'rtpi-proxy',
-            'rtpi-tools',
-            'sysreptor-app'
-        ]
+        levels = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for svc in self.startup_order:
+            levels[depth[svc]].append(svc)
+        return levels
+    
+    def get_startup_levels(self) -> List[List[str]]:
+        """Get services grouped into levels that can be started in parallel"""
+        return self.startup_levels
     
     def get_startup_order(self) -> List[str]:
         """Get the correct startup order for services"""
         return self.startup_order
     
-    def get_dependencies(self, service_name: str) -> List[str]:
+    def get_dependencies(self, service_name: str) -> FrozenSet[str]:
         """Get dependencies for a service"""
-        return self.dependencies.get(service_name, [])
+        return self.dependencies.get(service_name, frozenset())
+    
+    def get_dependents(self, service_name: str) -> FrozenSet[str]:
+        """Get services that depend directly on a service"""
+        return self.dependents.get(service_name, frozenset())
     
-    def can_start_service(self, service_name: str, running_services: List[str]) -> bool:
+    def can_start_service(self, service_name: str, running_services: Set[str]) -> bool:
         """Check if service can be started based on dependencies"""
-        deps = self.get_dependencies(service_name)
-        return all(dep in running_services for dep in deps)
+        return self.get_dependencies(service_name) <= running_services
 
 class ContainerOrchestrator:
     """Main container orchestration service"""
     
     def __init__(self):
         self.docker_client = docker.from_env()
+        self.probe_timeout = 5  # seconds; bounds each custom health probe exec
+        self.probe_api = docker.from_env(timeout=self.probe_timeout).api
         self.dependency_manager = ServiceDependencyManager()
         self.running = True
+        self._stop_event = threading.Event()
         self.orchestration_actions = 0
-        self.last_health_check = datetime.now()
+        self._start_mono = time.monotonic()
+        self._last_hc_mono = None  # set at the end of each health cycle
         
         # Portainer configuration
         self.portainer_url = "http://localhost:9000"
         self.portainer_token = None
+        self.portainer_token_exp = 0  # JWT 'exp' claim, epoch seconds
+        
+        # Shared HTTP session for Portainer and healer calls
+        self.http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset(['GET', 'POST'])
+            )
+        )
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
         
         # Flask app for API endpoints
         self.app = Flask(__name__)
@@ -91,11 +181,32 @@ class ContainerOrchestrator:
         
         # Service health tracking
         self.service_health = {}
+        
+        # Short-lived snapshot of get_service_status shared by the API and health loop
+        self._svc_status_cache = None
+        self._svc_status_json = b'{}'
+        self._svc_status_cached_at = 0
+        self._svc_status_ttl = 5  # seconds
+        self._svc_status_lock = threading.Lock()
+        self._svc_refresh_lock = threading.Lock()  # one Docker refresh at a time
         self.health_check_interval = 30  # seconds
+        self._hc_lock = threading.Lock()  # one health cycle at a time
+        self.health_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hc')
+        self.notify_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='notify')
+        
+        # Per-service circuit breakers for the custom exec probes
+        self.breakers = defaultdict(lambda: {'fail': 0, 'open_until': 0, 'last': {}})
+        self.breaker_threshold = 3  # consecutive probe errors before opening
+        self.breaker_cooldown = 60  # seconds to skip probing once open
+        
+        # Orchestrator-initiated restart backoff per service
+        self._restart_backoff = {}
         
         # Backup configuration
         self.backup_enabled = True
         self.backup_retention_days = 7
+        self.backup_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='backup')
+        self._backup_lock = threading.Lock()  # shared by backup and restore, which touch the same data
         
         # Auto-scaling configuration
         self.scaling_enabled = True
@@ -110,38 +221,60 @@ class ContainerOrchestrator:
         
         @self.app.route('/health', methods=['GET'])
         def health_check():
-            return jsonify({
+            now = time.monotonic()
+            return _json_response({
                 'status': 'healthy',
-                'uptime': (datetime.now() - self.last_health_check).total_seconds(),
+                'uptime': now - self._start_mono,
+                'last_health_check_age': now - self._last_hc_mono if self._last_hc_mono else None,
                 'orchestration_actions': self.orchestration_actions,
                 'service_health': self.service_health
             })
         
+        @self.app.after_request
+        def add_cache_headers(response):
+            # /services is a snapshot refreshed every few seconds anyway
+            if request.path == '/services' and request.method == 'GET':
+                response.headers['Cache-Control'] = f'max-age={self._svc_status_ttl}'
+            return response
+        
         @self.app.route('/services', methods=['GET'])
         def list_services():
-            return jsonify(self.get_service_status())
+            fresh = request.args.get('fresh') == '1'
+            self.get_service_status(fresh=fresh)
+            return Response(self._svc_status_json, mimetype='application/json')
         
         @self.app.route('/services/<service_name>/restart', methods=['POST'])
         def restart_service(service_name):
             success = self.restart_service(service_name)
-            return jsonify({'success': success})
+            return _json_response({'success': success})
         
         @self.app.route('/services/<service_name>/scale', methods=['POST'])
         def scale_service(service_name):
             replicas = request.json.get('replicas', 1)
             success = self.scale_service(service_name, replicas)
-            return jsonify({'success': success})
+            return _json_response({'success': success})
+        
+        @self.app.route('/services/<service_name>/breaker/reset', methods=['POST'])
+        def reset_breaker(service_name):
+            self.breakers.pop(service_name, None)
+            return _json_response({'success': True})
         
         @self.app.route('/backup/create', methods=['POST'])
         def create_backup():
-            backup_id = self.create_backup()
-            return jsonify({'backup_id': backup_id})
+            try:
+                backup_id = self.create_backup()
+            except OperationInProgress as e:
+                return _json_response({'error': str(e)}, status=409)
+            return _json_response({'backup_id': backup_id})
         
         @self.app.route('/backup/restore', methods=['POST'])
         def restore_backup():
             backup_id = request.json.get('backup_id')
-            success = self.restore_backup(backup_id)
-            return jsonify({'success': success})
+            try:
+                success = self.restore_backup(backup_id)
+            except OperationInProgress as e:
+                return _json_response({'error': str(e)}, status=409)
+            return _json_response({'success': success})
     
     def authenticate_portainer(self):
         """Authenticate with Portainer API"""
@@ -152,9 +285,10 @@ class ContainerOrchestrator:
                 'password': 'rtpi-pen-admin'
             }
             
-            response = requests.post(auth_url, json=auth_data, timeout=10)
+            response = self.http.post(auth_url, json=auth_data, timeout=10)
             if response.status_code == 200:
                 self.portainer_token = response.json().get('jwt')
+                self.portainer_token_exp = self._jwt_expiry(self.portainer_token)
                 logger.info("Successfully authenticated with Portainer")
                 return True
             else:
@@ -164,9 +298,20 @@ class ContainerOrchestrator:
             logger.error(f"Error authenticating with Portainer: {e}")
             return False
     
+    def _jwt_expiry(self, token: Optional[str]) -> float:
+        """Read the 'exp' claim from a JWT without verifying it"""
+        try:
+            payload = token.split('.')[1]
+            claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+            return float(claims.get('exp', 0))
+        except Exception:
+            return 0
+    
     def get_portainer_headers(self):
         """Get headers for Portainer API requests"""
-        if not self.portainer_token:
+        # Tokens without an exp claim are kept until Portainer rejects them
+        expiring = self.portainer_token_exp and time.time() > self.portainer_token_exp - 60
+        if not self.portainer_token or expiring:
             self.authenticate_portainer()
         
         return {
@@ -174,12 +319,41 @@ class ContainerOrchestrator:
             'Content-Type': 'application/json'
         }
     
-    def get_service_status(self) -> Dict:
+    def get_service_status(self, fresh: bool = False) -> Dict:
         """Get status of all managed services"""
+        requested_at = time.monotonic()
+        with self._svc_status_lock:
+            cache_age = requested_at - self._svc_status_cached_at
+            if not fresh and self._svc_status_cache is not None and cache_age < self._svc_status_ttl:
+                return self._svc_status_cache
+        
+        # Single-flight: concurrent callers wait for one refresh instead of each hitting Docker
+        with self._svc_refresh_lock:
+            with self._svc_status_lock:
+                cached_at = self._svc_status_cached_at
+                cache_age = time.monotonic() - cached_at
+                if self._svc_status_cache is not None:
+                    if cached_at >= requested_at or (not fresh and cache_age < self._svc_status_ttl):
+                        return self._svc_status_cache
+            
+            try:
+                containers = self.docker_client.containers.list(all=True)
+            except Exception as e:
+                logger.error(f"Error getting service status: {e}")
+                return {}
+            
+            return self._update_service_status(containers)
+    
+    def _update_service_status(self, containers: List) -> Dict:
+        """Build the service status snapshot from listed containers and cache it"""
         services = {}
         
         try:
-            containers = self.docker_client.containers.list(all=True)
+            # One images call instead of hydrating container.image per container
+            image_tags = {
+                image.id: image.tags[0] if image.tags else 'unknown'
+                for image in self.docker_client.images.list()
+            }
             
             for container in containers:
                 service_name = container.name
@@ -188,17 +362,28 @@ class ContainerOrchestrator:
                 if service_name in ['rtpi-orchestrator']:
                     continue
                 
+                attrs = container.attrs
+                state = attrs.get('State', {})
                 services[service_name] = {
                     'status': container.status,
-                    'health': container.attrs.get('State', {}).get('Health', {}).get('Status', 'unknown'),
-                    'restart_count': container.attrs.get('RestartCount', 0),
-                    'created': container.attrs.get('Created', ''),
-                    'started_at': container.attrs.get('State', {}).get('StartedAt', ''),
-                    'image': container.image.tags[0] if container.image.tags else 'unknown'
+                    'health': (state.get('Health') or {}).get('Status', 'unknown'),
+                    'restart_count': attrs.get('RestartCount', 0),
+                    'created': attrs.get('Created', ''),
+                    'started_at': state.get('StartedAt', ''),
+                    'image': image_tags.get(attrs.get('Image'), 'unknown')
                 }
                 
         except Exception as e:
             logger.error(f"Error getting service status: {e}")
+            return services
+        
+        # Serialize once per refresh; /services serves these bytes as-is
+        body = _dumps(services)
+        
+        with self._svc_status_lock:
+            self._svc_status_cache = services
+            self._svc_status_json = body
+            self._svc_status_cached_at = time.monotonic()
         
         return services
     
@@ -213,10 +398,7 @@ class ContainerOrchestrator:
             self.orchestration_actions += 1
             
             # Wait for container to stabilize
-            time.sleep(10)
-            
-            container.reload()
-            if container.status == 'running':
+            if self._wait_until_ready(container, timeout=15):
                 logger.info(f"Service {service_name} restarted successfully")
                 return True
             else:
@@ -272,19 +454,19 @@ class ContainerOrchestrator:
             logger.error(f"Error scaling service {service_name}: {e}")
             return False
     
-    def check_service_health(self, service_name: str) -> Dict:
-        """Check health of a specific service"""
+    def check_service_health(self, container, now_iso: Optional[str] = None) -> Dict:
+        """Check health of a service from its already-listed container"""
+        service_name = container.name
+        now_iso = now_iso or datetime.now().isoformat()
         try:
-            container = self.docker_client.containers.get(service_name)
-            
             health_status = {
                 'name': service_name,
                 'status': container.status,
                 'health': 'unknown',
-                'last_check': datetime.now().isoformat()
+                'last_check': now_iso
             }
             
-            # Get health check status
+            # Get health check status from the listed attrs, no re-inspect
             health_state = container.attrs.get('State', {}).get('Health', {})
             if health_state:
                 health_status['health'] = health_state.get('Status', 'unknown')
@@ -292,21 +474,14 @@ class ContainerOrchestrator:
             
             # Additional health checks based on service type
             if service_name == 'rtpi-database':
-                health_status['custom_checks'] = self._check_database_health()
+                health_status['custom_checks'] = self._run_probe(container, self._check_database_health)
             elif service_name == 'rtpi-cache':
-                health_status['custom_checks'] = self._check_cache_health()
+                health_status['custom_checks'] = self._run_probe(container, self._check_cache_health)
             elif service_name == 'rtpi-proxy':
-                health_status['custom_checks'] = self._check_proxy_health()
+                health_status['custom_checks'] = self._run_probe(container, self._check_proxy_health)
             
             return health_status
             
-        except docker.errors.NotFound:
-            return {
-                'name': service_name,
-                'status': 'not_found',
-                'health': 'not_found',
-                'last_check': datetime.now().isoformat()
-            }
         except Exception as e:
             logger.error(f"Error checking health for {service_name}: {e}")
             return {
@@ -314,91 +489,161 @@ class ContainerOrchestrator:
                 'status': 'error',
                 'health': 'error',
                 'error': str(e),
-                'last_check': datetime.now().isoformat()
+                'last_check': now_iso
             }
     
-    def _check_database_health(self) -> Dict:
+    def _run_probe(self, container, probe) -> Dict:
+        """Run a custom probe unless its circuit is open after repeated errors"""
+        breaker = self.breakers[container.name]
+        if time.monotonic() < breaker['open_until']:
+            return {**breaker['last'], 'circuit_open': True}
+        
+        result = probe(container)
+        if 'error' in result:
+            breaker['fail'] += 1
+            if breaker['fail'] >= self.breaker_threshold:
+                breaker['open_until'] = time.monotonic() + self.breaker_cooldown
+                logger.warning(f"Skipping {container.name} probes for {self.breaker_cooldown}s after {breaker['fail']} failures")
+        else:
+            breaker['fail'] = 0
+            breaker['open_until'] = 0
+        
+        breaker['last'] = result
+        return result
+    
+    def _exec_probe(self, container, cmd: List[str]) -> Tuple[int, str]:
+        """Run a probe command in a container, giving up after probe_timeout seconds"""
+        # Separate low-level client so the short socket timeout only applies to probes;
+        # a timeout surfaces as a probe error and counts towards the circuit breaker
+        try:
+            exec_id = self.probe_api.exec_create(container.id, cmd)['Id']
+            output = self.probe_api.exec_start(exec_id)
+            exit_code = self.probe_api.exec_inspect(exec_id).get('ExitCode')
+        except requests.exceptions.Timeout:
+            raise TimeoutError(f"probe {cmd[0]} timed out after {self.probe_timeout}s")
+        return exit_code, (output or b'').decode(errors='replace').strip()
+    
+    def _check_database_health(self, container) -> Dict:
         """Check database specific health metrics"""
         try:
             # Test database connection
-            result = subprocess.run([
-                'docker', 'exec', 'rtpi-database', 'pg_isready', '-U', 'postgres'
-            ], capture_output=True, text=True, timeout=10)
+            exit_code, output = self._exec_probe(container, ['pg_isready', '-U', 'postgres'])
             
             return {
-                'postgres_ready': result.returncode == 0,
-                'postgres_output': result.stdout.strip()
+                'postgres_ready': exit_code == 0,
+                'postgres_output': output
             }
         except Exception as e:
             return {'error': str(e)}
     
-    def _check_cache_health(self) -> Dict:
+    def _check_cache_health(self, container) -> Dict:
         """Check cache specific health metrics"""
         try:
             # Test Redis connection
-            result = subprocess.run([
-                'docker', 'exec', 'rtpi-cache', 'redis-cli', 'ping'
-            ], capture_output=True, text=True, timeout=10)
+            exit_code, output = self._exec_probe(container, ['redis-cli', 'ping'])
             
             return {
-                'redis_ping': result.stdout.strip() == 'PONG',
-                'redis_output': result.stdout.strip()
+                'redis_ping': output == 'PONG',
+                'redis_output': output
             }
         except Exception as e:
             return {'error': str(e)}
     
-    def _check_proxy_health(self) -> Dict:
+    def _check_proxy_health(self, container) -> Dict:
         """Check proxy specific health metrics"""
         try:
             # Test nginx status
-            result = subprocess.run([
-                'docker', 'exec', 'rtpi-proxy', 'nginx', '-t'
-            ], capture_output=True, text=True, timeout=10)
+            exit_code, output = self._exec_probe(container, ['nginx', '-t'])
             
             return {
-                'nginx_config_valid': result.returncode == 0,
-                'nginx_output': result.stderr.strip()
+                'nginx_config_valid': exit_code == 0,
+                'nginx_output': output
             }
         except Exception as e:
             return {'error': str(e)}
     
     def perform_health_checks(self):
-        """Perform health checks on all services"""
+        """Perform health checks on all services, skipping if a cycle is still running"""
+        if not self._hc_lock.acquire(blocking=False):
+            logger.warning("Previous health check cycle still running, skipping")
+            return
+        try:
+            self._perform_health_checks()
+        finally:
+            self._hc_lock.release()
+    
+    def _perform_health_checks(self):
+        """Run one health check cycle"""
         try:
-            services = self.get_service_status()
+            # One list call per cycle; each container carries its inspect attrs
+            containers = self.docker_client.containers.list(all=True)
+            
+            # One timestamp for the whole cycle
+            now_iso = datetime.now().isoformat()
             
-            for service_name in services:
-                health_status = self.check_service_health(service_name)
+            # Prime the /services snapshot from the same listing
+            self._update_service_status(containers)
+            
+            # Probe services concurrently; one slow exec no longer stalls the cycle
+            by_name = {c.name: c for c in containers if c.name not in ['rtpi-orchestrator']}
+            futures = {
+                self.health_pool.submit(self.check_service_health, container, now_iso): name
+                for name, container in by_name.items()
+            }
+            
+            results = {}
+            try:
+                for future in as_completed(futures, timeout=20):
+                    service_name = futures[future]
+                    try:
+                        results[service_name] = future.result()
+                    except Exception as e:
+                        logger.error(f"Error checking health for {service_name}: {e}")
+            except FuturesTimeoutError:
+                pending = sorted(name for future, name in futures.items() if not future.done())
+                logger.warning(f"Health checks still running after 20s: {pending}")
+            
+            for service_name, health_status in results.items():
                 self.service_health[service_name] = health_status
                 
                 # Take action based on health status
                 if health_status['health'] == 'unhealthy':
                     logger.warning(f"Service {service_name} is unhealthy")
                     
-                    # Notify healer service
-                    self._notify_healer(service_name, 'unhealthy')
+                    # Notify healer service without waiting on its response
+                    self.notify_pool.submit(self._notify_healer, service_name, 'unhealthy', now_iso)
                     
                 elif health_status['status'] == 'exited':
                     logger.warning(f"Service {service_name} has exited")
                     
                     # Check if it should be restarted
-                    if self._should_restart_service(service_name):
-                        self.restart_service(service_name)
+                    if self._should_restart_service(service_name, by_name[service_name]):
+                        self._schedule_restart(service_name)
+                
+                elif health_status['status'] == 'running' and service_name in self._restart_backoff:
+                    # Forget the backoff once the service has stayed up past a full window
+                    backoff = self._restart_backoff[service_name]
+                    if time.monotonic() > backoff['next'] + backoff['delay']:
+                        del self._restart_backoff[service_name]
             
-            self.last_health_check = datetime.now()
+            self._last_hc_mono = time.monotonic()
             
         except Exception as e:
             logger.error(f"Error performing health checks: {e}")
     
-    def _should_restart_service(self, service_name: str) -> bool:
+    def _should_restart_service(self, service_name: str, container=None) -> bool:
         """Determine if a service should be automatically restarted"""
         # Check restart policy and backoff
         try:
-            container = self.docker_client.containers.get(service_name)
+            if container is None:
+                container = self.docker_client.containers.get(service_name)
             restart_policy = container.attrs.get('HostConfig', {}).get('RestartPolicy', {})
             
-            # If restart policy is set to always or unless-stopped, let Docker handle it
-            if restart_policy.get('Name') in ['always', 'unless-stopped']:
+            # If Docker's restart policy will bring it back, let Docker handle it
+            policy = restart_policy.get('Name')
+            if policy in ['always', 'unless-stopped']:
+                return False
+            if policy == 'on-failure' and container.attrs.get('State', {}).get('ExitCode', 0) != 0:
                 return False
             
             # Check if service has been failing repeatedly
@@ -407,24 +652,36 @@ class ContainerOrchestrator:
                 logger.warning(f"Service {service_name} has restarted {restart_count} times")
                 return False
             
+            # Back off between our own restarts: 30s, 60s, 120s
+            backoff = self._restart_backoff.get(service_name)
+            if backoff and time.monotonic() < backoff['next']:
+                return False
+            
             return True
             
         except Exception as e:
             logger.error(f"Error checking restart policy for {service_name}: {e}")
             return False
     
-    def _notify_healer(self, service_name: str, issue_type: str):
+    def _schedule_restart(self, service_name: str):
+        """Restart a service on the health pool and push out its next allowed restart"""
+        backoff = self._restart_backoff.get(service_name)
+        delay = min(backoff['delay'] * 2, 120) if backoff else 30
+        self._restart_backoff[service_name] = {'next': time.monotonic() + delay, 'delay': delay}
+        self.health_pool.submit(self.restart_service, service_name)
+    
+    def _notify_healer(self, service_name: str, issue_type: str, timestamp: Optional[str] = None):
         """Notify the healer service about an issue"""
         try:
             healer_url = "http://rtpi-healer:8888/heal"
             notification = {
                 'service': service_name,
                 'issue_type': issue_type,
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': timestamp or datetime.now().isoformat(),
                 'orchestrator_id': 'rtpi-orchestrator'
             }
             
-            response = requests.post(healer_url, json=notification, timeout=5)
+            response = self.http.post(healer_url, json=notification, timeout=(3, 15))
             if response.status_code == 200:
                 logger.info(f"Notified healer about {service_name} issue")
             else:
@@ -433,7 +690,16 @@ class ContainerOrchestrator:
         except Exception as e:
             logger.error(f"Error notifying healer: {e}")
     
-    def create_backup(self) -> str:
+    def create_backup(self) -> Optional[str]:
+        """Create a backup; raises OperationInProgress if a backup or restore is running"""
+        if not self._backup_lock.acquire(blocking=False):
+            raise OperationInProgress("backup or restore already in progress")
+        try:
+            return self._create_backup()
+        finally:
+            self._backup_lock.release()
+    
+    def _create_backup(self) -> Optional[str]:
         """Create a backup of Portainer data and configurations"""
         try:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -443,24 +709,35 @@ class ContainerOrchestrator:
             # Create backup directory
             os.makedirs(backup_path, exist_ok=True)
             
-            # Backup Portainer data
-            subprocess.run([
-                'docker', 'exec', 'rtpi-orchestrator', 'tar', 'czf',
-                f'{backup_path}/portainer-data.tar.gz', '/data'
-            ], check=True)
+            # Record partial failures in the manifest instead of abandoning the backup
+            errors = {}
+            
+            # Backup Portainer data; never leave a truncated archive behind
+            archive_path = f'{backup_path}/portainer-data.tar.gz'
+            try:
+                self._archive_portainer_data(archive_path)
+            except Exception as e:
+                logger.error(f"Error archiving Portainer data: {e}")
+                errors['portainer_data'] = str(e)
+                try:
+                    os.remove(archive_path)
+                except FileNotFoundError:
+                    pass
             
             # Backup docker-compose files
-            subprocess.run([
-                'cp', '/opt/rtpi-pen/docker-compose.yml',
-                f'{backup_path}/docker-compose.yml'
-            ], check=True)
+            try:
+                shutil.copy2('/opt/rtpi-pen/docker-compose.yml', f'{backup_path}/docker-compose.yml')
+            except Exception as e:
+                logger.error(f"Error copying docker-compose.yml: {e}")
+                errors['docker_compose'] = str(e)
             
             # Create backup manifest
             manifest = {
                 'backup_id': backup_id,
                 'timestamp': timestamp,
                 'services': list(self.get_service_status().keys()),
-                'created_by': 'rtpi-orchestrator'
+                'created_by': 'rtpi-orchestrator',
+                'errors': errors
             }
             
             with open(f'{backup_path}/manifest.json', 'w') as f:
@@ -473,7 +750,35 @@ class ContainerOrchestrator:
             logger.error(f"Error creating backup: {e}")
             return None
     
+    def _archive_portainer_data(self, archive_path: str):
+        """Stream /data out of the orchestrator container into a gzip'd tar, chunk by chunk"""
+        container = self.docker_client.containers.get('rtpi-orchestrator')
+        bits, _ = container.get_archive('/data')
+        with gzip.open(archive_path, 'wb', compresslevel=1) as gz:
+            for chunk in bits:
+                gz.write(chunk)
+    
+    def _schedule_backup(self):
+        """Run create_backup on the backup worker so the scheduler is not blocked"""
+        self.backup_pool.submit(self._scheduled_backup)
+    
+    def _scheduled_backup(self):
+        """Scheduled backup that skips quietly when another backup or restore is running"""
+        try:
+            self.create_backup()
+        except OperationInProgress:
+            logger.warning("Backup or restore already in progress, skipping scheduled backup")
+    
     def restore_backup(self, backup_id: str) -> bool:
+        """Restore from a backup; raises OperationInProgress if a backup or restore is running"""
+        if not self._backup_lock.acquire(blocking=False):
+            raise OperationInProgress("backup or restore already in progress")
+        try:
+            return self._restore_backup(backup_id)
+        finally:
+            self._backup_lock.release()
+    
+    def _restore_backup(self, backup_id: str) -> bool:
         """Restore from a backup"""
         try:
             backup_path = f"/data/backups/{backup_id}"
@@ -482,32 +787,33 @@ class ContainerOrchestrator:
                 logger.error(f"Backup {backup_id} not found")
                 return False
             
-            # Stop services
-            logger.info("Stopping services for restore...")
-            for service_name in reversed(self.dependency_manager.get_startup_order()):
-                try:
-                    container = self.docker_client.containers.get(service_name)
-                    container.stop()
-                    logger.info(f"Stopped {service_name}")
-                except:
-                    pass
-            
-            # Restore Portainer data
-            subprocess.run([
-                'docker', 'exec', 'rtpi-orchestrator', 'tar', 'xzf',
-                f'{backup_path}/portainer-data.tar.gz', '-C', '/'
-            ], check=True)
+            # Refuse incomplete backups before anything is stopped
+            archive_path = f'{backup_path}/portainer-data.tar.gz'
+            manifest_path = f'{backup_path}/manifest.json'
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as f:
+                    manifest_errors = json.load(f).get('errors') or {}
+                if 'portainer_data' in manifest_errors:
+                    logger.error(f"Backup {backup_id} has no usable Portainer data: {manifest_errors['portainer_data']}")
+                    return False
+            if not os.path.isfile(archive_path) or os.path.getsize(archive_path) == 0:
+                logger.error(f"Backup {backup_id} is missing its Portainer data archive")
+                return False
             
-            # Restart services
-            logger.info("Restarting services after restore...")
-            for service_name in self.dependency_manager.get_startup_order():
-                try:
-                    container = self.docker_client.containers.get(service_name)
-                    container.start()
-                    logger.info(f"Started {service_name}")
-                    time.sleep(5)  # Wait between starts
-                except:
-                    pass
+            # Stop services, dependents first
+            logger.info("Stopping services for restore...")
+            self._run_levels(reversed(self.dependency_manager.get_startup_levels()), self._stop_service)
+            
+            try:
+                # Restore Portainer data; the Docker API accepts gzip'd tar streams
+                container = self.docker_client.containers.get('rtpi-orchestrator')
+                with open(archive_path, 'rb') as archive:
+                    if not container.put_archive('/', archive):
+                        raise RuntimeError("Docker rejected the Portainer data archive")
+            finally:
+                # Bring services back whether or not the restore went through
+                logger.info("Restarting services after restore...")
+                self.startup_all()
             
             logger.info(f"Restored from backup: {backup_id}")
             return True
@@ -516,6 +822,53 @@ class ContainerOrchestrator:
             logger.error(f"Error restoring backup {backup_id}: {e}")
             return False
     
+    def _wait_until_ready(self, container, timeout: float = 30) -> bool:
+        """Poll until a container is running and not still in its health-check start period"""
+        deadline = time.monotonic() + timeout
+        while True:
+            container.reload()
+            health = container.attrs.get('State', {}).get('Health', {}).get('Status', 'none')
+            if container.status == 'running' and health in ('healthy', 'none'):
+                return True
+            if container.status in ('exited', 'dead') or time.monotonic() >= deadline:
+                return False
+            time.sleep(1)
+    
+    def _start_service(self, service_name: str) -> bool:
+        """Start a service and wait for it to become ready"""
+        try:
+            container = self.docker_client.containers.get(service_name)
+            container.start()
+            logger.info(f"Started {service_name}")
+            return self._wait_until_ready(container)
+        except Exception as e:
+            logger.error(f"Error starting {service_name}: {e}")
+            return False
+    
+    def _stop_service(self, service_name: str) -> bool:
+        """Stop a service"""
+        try:
+            container = self.docker_client.containers.get(service_name)
+            container.stop()
+            logger.info(f"Stopped {service_name}")
+            return True
+        except Exception:
+            return False
+    
+    def _run_levels(self, levels, action) -> Dict[str, bool]:
+        """Apply action to each level's services concurrently, one level at a time"""
+        results = {}
+        for level in levels:
+            with ThreadPoolExecutor(max_workers=len(level)) as executor:
+                futures = {executor.submit(action, svc): svc for svc in level}
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+        return results
+    
+    def startup_all(self) -> Dict[str, bool]:
+        """Start all managed services, one dependency level at a time"""
+        return self._run_levels(self.dependency_manager.get_startup_levels(), self._start_service)
+    
     def cleanup_old_backups(self):
         """Clean up old backups based on retention policy"""
         try:
@@ -523,35 +876,38 @@ class ContainerOrchestrator:
             if not os.path.exists(backup_dir):
                 return
             
-            cutoff_date = datetime.now() - timedelta(days=self.backup_retention_days)
-            
-            for backup_name in os.listdir(backup_dir):
-                backup_path = os.path.join(backup_dir, backup_name)
-                if os.path.isdir(backup_path):
-                    # Check backup age
-                    manifest_path = os.path.join(backup_path, 'manifest.json')
-                    if os.path.exists(manifest_path):
-                        try:
-                            with open(manifest_path, 'r') as f:
-                                manifest = json.load(f)
-                            
-                            backup_date = datetime.strptime(
-                                manifest['timestamp'], '%Y%m%d_%H%M%S'
-                            )
-                            
-                            if backup_date < cutoff_date:
-                                subprocess.run(['rm', '-rf', backup_path], check=True)
-                                logger.info(f"Removed old backup: {backup_name}")
-                                
-                        except Exception as e:
-                            logger.error(f"Error checking backup {backup_name}: {e}")
+            # Age comes from the directory mtime, so no manifest reads are needed
+            cutoff = time.time() - self.backup_retention_days * 86400
+            
+            with os.scandir(backup_dir) as entries:
+                for entry in entries:
+                    if not entry.name.startswith('rtpi-backup-') or not entry.is_dir(follow_symlinks=False):
+                        continue
+                    try:
+                        if entry.stat(follow_symlinks=False).st_mtime >= cutoff:
+                            continue
+                        shutil.rmtree(entry.path)
+                        logger.info(f"Removed old backup: {entry.name}")
+                    except Exception as e:
+                        logger.error(f"Error checking backup {entry.name}: {e}")
             
         except Exception as e:
             logger.error(f"Error cleaning up backups: {e}")
     
     def run_api_server(self):
         """Run the Flask API server"""
-        self.app.run(host='0.0.0.0', port=8080, debug=False)
+        if serve:
+            serve(self.app, host='0.0.0.0', port=8080, threads=8, connection_limit=100, channel_timeout=30)
+        else:
+            self.app.run(host='0.0.0.0', port=8080, debug=False, threaded=True)
+    
+    def stop(self):
+        """Stop the main loop and wake it if it is sleeping"""
+        self.running = False
+        self._stop_event.set()
+        self.health_pool.shutdown(wait=False)
+        self.notify_pool.shutdown(wait=False)
+        self.backup_pool.shutdown(wait=False)
     
     def run(self):
         """Main orchestrator loop"""
@@ -560,16 +916,22 @@ class ContainerOrchestrator:
         # Schedule periodic tasks
         schedule.every(self.health_check_interval).seconds.do(self.perform_health_checks)
         schedule.every(1).hours.do(self.cleanup_old_backups)
-        schedule.every(6).hours.do(self.create_backup)
+        schedule.every(6).hours.do(self._schedule_backup)
         
         # Start API server in separate thread
         api_thread = threading.Thread(target=self.run_api_server, daemon=True)
         api_thread.start()
         
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        
         try:
             while self.running:
                 schedule.run_pending()
-                time.sleep(1)
+                # Sleep until the next job is due instead of polling every second
+                idle = schedule.idle_seconds()
+                if idle is None:
+                    idle = 60
+                self._stop_event.wait(max(0.1, min(idle, 60)))
         except KeyboardInterrupt:
             logger.info("Received shutdown signal")
             self.running = False